@@ -1,6 +1,7 @@
+from functools import lru_cache
 from pydantic import field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import List, Any
+from typing import Tuple, Any
 
 
 class Settings(BaseSettings):
@@ -13,21 +14,22 @@ class Settings(BaseSettings):
     # CORS
     # Can be a JSON list: ["http://localhost:3000"]
     # or a comma-separated string: http://localhost:3000,http://example.com
-    CORS_ORIGINS: Any = ["http://localhost:3000"]
+    # Frozen to a tuple after validation so it can be shared without copies
+    CORS_ORIGINS: Any = ("http://localhost:3000",)
 
     @field_validator("CORS_ORIGINS", mode="before")
     @classmethod
-    def assemble_cors_origins(cls, v: Any) -> List[str]:
+    def assemble_cors_origins(cls, v: Any) -> Tuple[str, ...]:
         if isinstance(v, str):
             if v.startswith("["):
                 import json
                 try:
-                    return json.loads(v)
+                    return tuple(json.loads(v))
                 except Exception:
                     raise ValueError(f"Invalid JSON in CORS_ORIGINS: {v}")
-            return [i.strip() for i in v.split(",")]
-        if isinstance(v, list):
-            return v
+            return tuple(i.strip() for i in v.split(","))
+        if isinstance(v, (list, tuple)):
+            return tuple(v)
         raise ValueError(f"Excluded type for CORS_ORIGINS: {type(v)}")
 
     # Supabase
@@ -45,4 +47,10 @@ class Settings(BaseSettings):
     NEO4J_DATABASE: str = "neo4j"
 
 
-settings = Settings()
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Build Settings once (env parsing + validators) and reuse it everywhere."""
+    return Settings()
+
+
+settings = get_settings()
@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+from typing import Any
+
+import orjson
+from fastapi import Response
+
+
+def trusted_json(data: Any) -> Response:
+    """
+    Serialise rows that are already shaped (e.g. straight from Supabase) with orjson.
+    Returning a Response skips FastAPI's response_model validation; the model is
+    still used for the OpenAPI schema.
+    """
+    return Response(orjson.dumps(data), media_type="application/json")
+
+
+def sse_frame(obj: dict[str, Any]) -> bytes:
+    """Encode one SSE `data:` frame as bytes (StreamingResponse sends bytes as-is)."""
+    return b"data: " + orjson.dumps(obj) + b"\n\n"
@@ -1,17 +1,83 @@
-from supabase import create_client, Client
+from __future__ import annotations
+
+import asyncio
+from functools import lru_cache
+from typing import TYPE_CHECKING, Callable, TypeVar
+
 from app.core.config import settings
 
-_supabase: Client | None = None
+if TYPE_CHECKING:
+    from supabase import AsyncClient, Client
+
+T = TypeVar("T")
+
+
+@lru_cache(maxsize=1)
+def get_supabase() -> "Client":
+    """Sync client — only for code that runs its calls in worker threads (ingestion)."""
+    # Imported lazily — the supabase SDK is heavy and not every worker needs it
+    from supabase import create_client
+
+    return create_client(
+        settings.SUPABASE_URL,
+        settings.SUPABASE_SERVICE_ROLE_KEY,
+    )
+
+
+_async_supabase: "AsyncClient | None" = None
+_async_supabase_lock = asyncio.Lock()
+
+
+async def get_async_supabase() -> "AsyncClient":
+    """Async client for code on the event loop (routers, background workers); created on first use."""
+    global _async_supabase
+    if _async_supabase is None:
+        async with _async_supabase_lock:
+            if _async_supabase is None:
+                # Imported lazily, like the sync client — processes that never touch Supabase skip it
+                from supabase import acreate_client
+
+                _async_supabase = await acreate_client(
+                    settings.SUPABASE_URL,
+                    settings.SUPABASE_SERVICE_ROLE_KEY,
+                )
+    return _async_supabase
+
+
+async def close_async_supabase() -> None:
+    """
+    Close the async client's HTTP sessions and forget it (called from the app lifespan
+    on shutdown), so a later lifespan on a new event loop starts from a fresh client.
+    """
+    global _async_supabase, _async_supabase_lock
+    sb, _async_supabase = _async_supabase, None
+    # The lock binds to the loop it was first contended on; start the next lifespan fresh
+    _async_supabase_lock = asyncio.Lock()
+    if sb is None:
+        return
+    # postgrest/storage/functions are created lazily — close only the ones that were built
+    sessions = [sb._postgrest.session if sb._postgrest else None,
+                sb._storage.session if sb._storage else None,
+                sb._functions._client if sb._functions else None]
+    for session in filter(None, sessions):
+        await session.aclose()
+    await sb.auth.close()
+
+
+async def supabase_dep() -> "AsyncClient":
+    """
+    FastAPI dependency — the shared async client. Created on the first request that
+    needs it, so a missing SUPABASE_URL only fails those requests, not app startup.
+    """
+    return await get_async_supabase()
 
 
-def get_supabase() -> Client:
-    global _supabase
-    if _supabase is None:
-        _supabase = create_client(
-            settings.SUPABASE_URL,
-            settings.SUPABASE_SERVICE_ROLE_KEY,
-        )
-    return _supabase
+async def sb_call(fn: Callable[[], T]) -> T:
+    """
+    Run a blocking Supabase call (e.g. `lambda: sb.table(...).execute()`) off the
+    event loop, on the bounded default executor installed in the app lifespan.
+    """
+    return await asyncio.get_running_loop().run_in_executor(None, fn)
 
 
 # Alias used by ingestion services that need the service-role (admin) client
@@ -0,0 +1,49 @@
+"""
+Small in-process TTL + LRU cache shared by services that memoise lookups.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from typing import Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """
+    Entries expire `ttl` seconds after they were set; at most `maxsize` are kept,
+    evicting the least recently used (hits count as use). Not thread-safe — meant
+    for code running on the event loop.
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # key -> (monotonic time set, value), least recently used first
+        self._data: OrderedDict[K, tuple[float, V]] = OrderedDict()
+
+    def get(self, key: K) -> V | None:
+        """Value for `key`, or None if it's missing or expired."""
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[0] >= self.ttl:
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return entry[1]
+
+    def set(self, key: K, value: V) -> None:
+        self._data[key] = (time.monotonic(), value)
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: K) -> None:
+        self._data.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -1,23 +1,63 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.core.config import settings
+from app.core.config import get_settings
+from app.core.supabase import close_async_supabase
 from app.routers import health, auth, chat, projects, papers, messages
-from app.services import neo4j_service
+from app.services import message_service, neo4j_service, research_agent, web_search_service
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+def _log_worker_exit(task: asyncio.Task) -> None:
+    """Done-callback for background workers: they only stop on cancel, so anything else is a crash."""
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Background worker %s died", task.get_name(), exc_info=task.exception())
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     print(f"🚀 Saraswati AI Backend starting — env: {settings.ENVIRONMENT}")
+    # One bounded pool for all blocking I/O (Supabase, ArXiv, Gemini SDK calls).
+    # Installed as the loop default so run_in_executor(None, ...) uses it too.
+    app.state.pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix="blocking-io")
+    asyncio.get_running_loop().set_default_executor(app.state.pool)
+    # Chat messages are persisted in batches by a background worker
+    app.state.msg_queue = asyncio.Queue(maxsize=10000)
+    msg_worker = asyncio.create_task(message_service.drain_messages(app.state.msg_queue), name="msg-worker")
+    # Neo4j writes for fetched papers are drained by their own worker
+    app.state.graph_queue = asyncio.Queue(maxsize=1024)
+    graph_worker = asyncio.create_task(research_agent.drain_graph_writes(app.state.graph_queue), name="graph-worker")
+    for worker in (msg_worker, graph_worker):
+        worker.add_done_callback(_log_worker_exit)
+    # Paper ingestion runs as detached tasks, at most 4 at a time
+    app.state.ingest_sem = asyncio.Semaphore(4)
+    app.state.ingest_tasks = set()
     try:
         await neo4j_service.setup_constraints()
     except Exception as exc:
         print(f"⚠️  Neo4j setup skipped: {exc}")
     yield
     # Shutdown
+    for task in app.state.ingest_tasks:
+        task.cancel()
+    await asyncio.gather(*app.state.ingest_tasks, return_exceptions=True)
+    msg_worker.cancel()
+    await asyncio.gather(msg_worker, return_exceptions=True)
+    await message_service.flush_messages(app.state.msg_queue)
+    graph_worker.cancel()
+    await asyncio.gather(graph_worker, return_exceptions=True)
+    await research_agent.flush_graph_writes(app.state.graph_queue)
     await neo4j_service.close_driver()
+    await web_search_service.close_http()
+    await close_async_supabase()
+    app.state.pool.shutdown(wait=True)
     print("👋 Saraswati AI Backend shutting down")
 
 
@@ -29,12 +69,14 @@ app = FastAPI(
 )
 
 # ── CORS ────────────────────────────────────────────────────────────────────
+# Explicit allow-lists: origins as a frozenset for O(1) matching, and only the
+# methods/headers the frontend actually sends
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=settings.CORS_ORIGINS,
+    allow_origins=frozenset(settings.CORS_ORIGINS),
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=("GET", "POST", "DELETE", "OPTIONS"),
+    allow_headers=("authorization", "content-type"),
 )
 
 # ── Routers ─────────────────────────────────────────────────────────────────
@@ -5,19 +5,55 @@ POST /api/v1/chat/research → text/event-stream
 
 from __future__ import annotations
 
-import json
 import uuid
+from functools import lru_cache
+from operator import attrgetter
 from typing import Any
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
-from app.services import research_agent
+from app.core.responses import sse_frame
+from app.services import message_service, research_agent
 
 router = APIRouter()
 
 
+# ── Greeting content (static apart from the project title) ─────────────────
+_GREETING_LINES = (
+    "## Welcome to your research canvas! 👋\n\n"
+    "I'm **Saraswati**, your AI research guide for *{project_title}*. "
+    "I can help you discover papers, understand concepts, compare ideas, and build knowledge.\n\n"
+    "To get started — **what's your current familiarity** with this topic?\n"
+).split("\n")
+
+_CHIPS = (
+    "I'm a complete beginner",
+    "I know the basics",
+    "I'm an expert — go deep",
+    "Just show me the top papers",
+)
+
+# Lines without the title are serialised once here; None marks the line to render per title
+_GREETING_FRAMES = tuple(
+    None if "{project_title}" in line else sse_frame({"type": "text", "content": line + "\n"})
+    for line in _GREETING_LINES
+)
+_CHIPS_FRAME = sse_frame({"type": "suggestion_chips", "chips": _CHIPS})
+_DONE_FRAME = sse_frame({"type": "done"})
+
+
+@lru_cache(maxsize=256)
+def _render_greeting(project_title: str) -> bytes:
+    """Full greeting SSE body for a project title — only the title varies between calls."""
+    frames = [
+        frame or sse_frame({"type": "text", "content": line.format(project_title=project_title) + "\n"})
+        for line, frame in zip(_GREETING_LINES, _GREETING_FRAMES)
+    ]
+    return b"".join(frames) + _CHIPS_FRAME + _DONE_FRAME
+
+
 # ── Request / Response models ─────────────────────────────────────────────
 class HistoryMessage(BaseModel):
     role: str   # "user" | "assistant"
@@ -43,22 +79,53 @@ class ResearchChatRequest(BaseModel):
 
 # ── SSE research endpoint ─────────────────────────────────────────────────
 @router.post("/research")
-async def research_chat(body: ResearchChatRequest) -> StreamingResponse:
+async def research_chat(body: ResearchChatRequest, request: Request) -> StreamingResponse:
     """
     Streams SSE events from the Gemini research agent.
     Event types: text | paper_artifact | suggestion_chips | status | error | done
+    The turn is persisted through the background message queue — the stream
+    itself never waits on Supabase.
     """
-    history = [{"role": m.role, "content": m.content} for m in body.history]
-    active_paper = body.active_paper.model_dump() if body.active_paper else None
+    # Both models hold only plain str/list fields, so their __dict__ already is the
+    # dict shape the agent wants — skip pydantic's serializer. The agent never
+    # mutates history entries, so sharing them is safe.
+    history = list(map(attrgetter("__dict__"), body.history))
+    active_paper = body.active_paper.__dict__.copy() if body.active_paper else None
+    queue = request.app.state.msg_queue
+    message_service.enqueue(queue, body.project_id, "user", content=body.message)
+
+    text_parts: list[str] = []
+    extras: list[tuple[str, dict[str, Any]]] = []
+
+    def collect(event: dict[str, Any]) -> None:
+        # Rebuild the turn from the agent's event dicts — the frames are never re-parsed.
+        # Errors are shown live but not persisted (they'd replay on every reload).
+        etype = event["type"]
+        if etype == "text":
+            text_parts.append(event["content"])
+        elif etype == "paper_artifact":
+            extras.append(("paper_artifact", {"paper": event["paper"]}))
+        elif etype == "suggestion_chips":
+            extras.append(("chips", {"chips": event["chips"]}))
 
     async def event_stream():
-        async for chunk in research_agent.run_research_stream(
-            message=body.message,
-            history=history,
-            project_id=body.project_id,
-            active_paper=active_paper,
-        ):
-            yield chunk
+        try:
+            async for chunk in research_agent.run_research_stream(
+                message=body.message,
+                history=history,
+                project_id=body.project_id,
+                active_paper=active_paper,
+                on_event=collect,
+                graph_queue=request.app.state.graph_queue,
+            ):
+                yield chunk
+        finally:
+            # Queue the assistant reply first, then artifacts — same order the canvas shows
+            content = "".join(text_parts)
+            if content:
+                message_service.enqueue(queue, body.project_id, "assistant", content=content)
+            for msg_type, metadata in extras:
+                message_service.enqueue(queue, body.project_id, msg_type, metadata=metadata)
 
     return StreamingResponse(
         event_stream(),
@@ -78,24 +145,9 @@ async def research_greeting(project_id: str, project_title: str = "your project"
     Returns a greeting SSE stream when a fresh canvas is opened.
     Asks the user what they want to explore.
     """
-    GREETING = (
-        f"## Welcome to your research canvas! 👋\n\n"
-        f"I'm **Saraswati**, your AI research guide for *{project_title}*. "
-        f"I can help you discover papers, understand concepts, compare ideas, and build knowledge.\n\n"
-        f"To get started — **what's your current familiarity** with this topic?\n"
-    )
-    CHIPS = [
-        "I'm a complete beginner",
-        "I know the basics",
-        "I'm an expert — go deep",
-        "Just show me the top papers",
-    ]
-
     async def greet_stream():
-        for line in GREETING.split('\n'):
-            yield f"data: {json.dumps({'type': 'text', 'content': line + chr(10)})}\n\n"
-        yield f"data: {json.dumps({'type': 'suggestion_chips', 'chips': CHIPS})}\n\n"
-        yield f"data: {json.dumps({'type': 'done'})}\n\n"
+        # One chunk is fine — SSE clients parse frames, not chunk boundaries
+        yield _render_greeting(project_title)
 
     return StreamingResponse(
         greet_stream(),
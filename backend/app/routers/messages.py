@@ -14,35 +14,47 @@ Table schema (run once in Supabase SQL editor):
 
   CREATE INDEX IF NOT EXISTS chat_messages_project_idx
     ON chat_messages (project_id, created_at ASC);
+
+  -- Serves keyset pagination (project_id = ? AND id > ? ORDER BY id)
+  CREATE INDEX IF NOT EXISTS chat_messages_project_id_idx
+    ON chat_messages (project_id, id ASC);
 """
 
 from __future__ import annotations
 
 import logging
-from typing import Any, Optional
+from typing import TYPE_CHECKING, Any, Literal, Optional
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
 from pydantic import BaseModel
 
-from app.core.supabase import get_supabase
+from app.core.responses import trusted_json
+from app.core.supabase import supabase_dep
 from app.routers.projects import get_current_user_id
+from app.services.message_service import TABLE
+
+if TYPE_CHECKING:
+    from supabase import AsyncClient
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-TABLE = "chat_messages"
-
-# Types we actually persist (skip 'status' — transient noise)
-PERSISTABLE = {"user", "assistant", "chips", "paper_artifact", "error"}
+# Types we actually persist (skip 'status' — transient noise).
+# Enforced by pydantic-core on input: anything else is a 422.
+MsgType = Literal["user", "assistant", "chips", "paper_artifact", "error"]
 
 
 # ── Models ────────────────────────────────────────────────────────────────
 class MessageIn(BaseModel):
-    msg_type: str
+    msg_type: MsgType
     content: Optional[str] = None
     metadata: Optional[dict[str, Any]] = None   # chips list or paper dict
 
 
+class MessageBatchIn(BaseModel):
+    messages: list[MessageIn]
+
+
 class MessageOut(BaseModel):
     id: int
     project_id: str
@@ -52,37 +64,51 @@ class MessageOut(BaseModel):
     created_at: str
 
 
+class MessagePage(BaseModel):
+    messages: list[MessageOut]
+    next_after: Optional[int]   # pass as ?after_id= to get the next page; null when done
+
+
+# Only the columns MessageOut exposes — new table columns don't bloat the payload
+_COLUMNS = ",".join(MessageOut.model_fields)
+
+
 # ── Endpoints ─────────────────────────────────────────────────────────────
-@router.get("/{project_id}/messages", response_model=list[MessageOut])
-async def get_messages(project_id: str, user_id: str = Depends(get_current_user_id)):
-    """Load full chat history for a project, ordered oldest-first."""
+@router.get("/{project_id}/messages", response_model=MessagePage)
+async def get_messages(
+    project_id: str,
+    after_id: Optional[int] = Query(None, description="Return messages with id greater than this"),
+    limit: int = Query(200, ge=1, le=500),
+    user_id: str = Depends(get_current_user_id),
+    sb: AsyncClient = Depends(supabase_dep),
+):
+    """
+    Load one page of chat history for a project, oldest-first.
+    Keyset-paginated on id, so every page is an index range scan however long the history.
+    """
     try:
-        sb = get_supabase()
         # Note: We filter by project_id. Ideally chat_messages would also have a user_id 
         # column for RLS, but for now we rely on the project_id being a secure UUID.
         # To be fully secure, let's verify the project belongs to the user first or
         # add user_id to the chat_messages table.
-        resp = (
-            sb.table(TABLE)
-            .select("*")
-            .eq("project_id", project_id)
-            .order("created_at", desc=False)
-            .execute()
-        )
-        return resp.data or []
+        q = sb.table(TABLE).select(_COLUMNS).eq("project_id", project_id)
+        if after_id is not None:
+            q = q.gt("id", after_id)
+        resp = await q.order("id").limit(limit).execute()
+        rows = resp.data or []
+        # A short page means we've reached the end — saves the client an empty request
+        next_after = rows[-1]["id"] if len(rows) == limit else None
+        return trusted_json({"messages": rows, "next_after": next_after})
     except Exception as exc:
         logger.error("Failed to load messages for %s: %s", project_id, exc)
         raise HTTPException(status_code=500, detail=str(exc))
 
 
 @router.post("/{project_id}/messages", response_model=MessageOut)
-async def save_message(project_id: str, body: MessageIn, user_id: str = Depends(get_current_user_id)):
+async def save_message(project_id: str, body: MessageIn, user_id: str = Depends(get_current_user_id), sb: AsyncClient = Depends(supabase_dep)):
     """Persist a single chat message for a project."""
-    if body.msg_type not in PERSISTABLE:
-        raise HTTPException(status_code=400, detail=f"msg_type '{body.msg_type}' is not persistable")
     try:
-        sb = get_supabase()
-        resp = (
+        resp = await (
             sb.table(TABLE)
             .insert({
                 "project_id": project_id,
@@ -98,12 +124,25 @@ async def save_message(project_id: str, body: MessageIn, user_id: str = Depends(
         raise HTTPException(status_code=500, detail=str(exc))
 
 
+@router.post("/{project_id}/messages/batch", response_model=list[MessageOut])
+async def save_messages(project_id: str, body: MessageBatchIn, user_id: str = Depends(get_current_user_id), sb: AsyncClient = Depends(supabase_dep)):
+    """Persist several chat messages for a project in one insert."""
+    rows = [{"project_id": project_id, **m.model_dump()} for m in body.messages]
+    if not rows:
+        return []
+    try:
+        resp = await sb.table(TABLE).insert(rows).execute()
+        return resp.data or []
+    except Exception as exc:
+        logger.error("Failed to save %d messages for %s: %s", len(rows), project_id, exc)
+        raise HTTPException(status_code=500, detail=str(exc))
+
+
 @router.delete("/{project_id}/messages")
-async def clear_messages(project_id: str, user_id: str = Depends(get_current_user_id)):
+async def clear_messages(project_id: str, user_id: str = Depends(get_current_user_id), sb: AsyncClient = Depends(supabase_dep)):
     """Clear all chat history for a project (e.g. 'Start fresh')."""
     try:
-        sb = get_supabase()
-        sb.table(TABLE).delete().eq("project_id", project_id).execute()
+        await sb.table(TABLE).delete().eq("project_id", project_id).execute()
         return {"cleared": True}
     except Exception as exc:
         raise HTTPException(status_code=500, detail=str(exc))
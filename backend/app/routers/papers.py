@@ -4,16 +4,44 @@ Papers router — paper discovery & recommendations.
 
 from __future__ import annotations
 
+import asyncio
 import logging
-from typing import Any
+import time
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any
 
-from fastapi import APIRouter, BackgroundTasks, Query
+from fastapi import APIRouter, Depends, Query, Request
 
+from app.core.supabase import supabase_dep
 from app.services import arxiv_service, ingestion_service
 
+if TYPE_CHECKING:
+    from supabase import AsyncClient
+
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+_MAX_LIMIT = 12   # upper bound of the `limit` query param — also the cached list length
+
+# (monotonic time computed, ISO threshold) — a minute of drift is irrelevant for a 24h TTL
+_threshold_cache: tuple[float, str] = (float("-inf"), "")
+
+
+def _cache_threshold() -> str:
+    """ISO timestamp 24h ago, recomputed at most once a minute."""
+    global _threshold_cache
+    now = time.monotonic()
+    if now - _threshold_cache[0] > 60:
+        _threshold_cache = (now, (datetime.utcnow() - timedelta(hours=24)).isoformat())
+    return _threshold_cache[1]
+
+
+@lru_cache(maxsize=_MAX_LIMIT)
+def _cache_select(limit: int) -> str:
+    """PostgREST select that pulls only the first `limit` papers out of the cached JSONB array."""
+    return ",".join(f"p{i}:papers->{i}" for i in range(limit))
+
 
 def _deduplicate(papers: list[dict[str, Any]]) -> list[dict[str, Any]]:
     """Remove duplicate papers by arxiv_id, preserving order."""
@@ -27,6 +55,15 @@ def _deduplicate(papers: list[dict[str, Any]]) -> list[dict[str, Any]]:
     return unique
 
 
+async def _ingest_bounded(sem: asyncio.Semaphore, paper: dict[str, Any]) -> None:
+    """Ingest one paper under the shared concurrency cap; failures are logged, not raised."""
+    async with sem:
+        try:
+            await ingestion_service.ingest_paper(paper)
+        except Exception as exc:
+            logger.error("Ingestion failed for %s: %s", paper.get("arxiv_id"), exc)
+
+
 def _format_for_response(paper: dict[str, Any]) -> dict[str, Any]:
     """Trim paper dict to only the fields we send to the frontend."""
     abstract = paper.get("abstract") or ""
@@ -47,12 +84,13 @@ def _format_for_response(paper: dict[str, Any]) -> dict[str, Any]:
     response_model=list[dict],
 )
 async def get_recommendations(
-    background_tasks: BackgroundTasks,
+    request: Request,
     interests: str = Query(
         "Machine Learning",
         description="Comma-separated list of research interests",
     ),
-    limit: int = Query(4, ge=1, le=12, description="Number of papers to return"),
+    limit: int = Query(4, ge=1, le=_MAX_LIMIT, description="Number of papers to return"),
+    sb: AsyncClient = Depends(supabase_dep),
 ) -> list[dict[str, Any]]:
     """
     Fetches paper recommendations from ArXiv based on user interests.
@@ -66,49 +104,52 @@ async def get_recommendations(
     cache_key = ",".join(sorted(topics)).lower()
     
     # 1. Try Cache First
-    from app.core.supabase import get_supabase
-    sb = get_supabase()
-    from datetime import datetime, timedelta
-    
     try:
         # We look for a cache entry less than 24 hours old
-        threshold = (datetime.utcnow() - timedelta(hours=24)).isoformat()
-        cache_resp = (
+        threshold = _cache_threshold()
+        cache_resp = await (
             sb.table("recommendation_cache")
-            .select("papers, created_at")
+            .select(_cache_select(limit))
             .eq("interests", cache_key)
             .gt("created_at", threshold)
             .execute()
         )
         if cache_resp.data:
             logger.info("Serving paper recommendations from cache for: %s", cache_key)
-            cached_papers = cache_resp.data[0]["papers"]
-            return cached_papers[:limit]
+            row = cache_resp.data[0]
+            # Indexes past the end of the cached list come back as null
+            return [row[f"p{i}"] for i in range(limit) if row.get(f"p{i}") is not None]
     except Exception as exc:
         logger.warning("Cache check failed: %s", exc)
 
-    # 2. Cache Miss: Fetch from ArXiv
-    all_papers: list[dict[str, Any]] = []
-    for topic in topics[:3]:
-        fetched = await arxiv_service.search_papers(topic, max_results=5) # Fetch a few more to populate cache well
-        all_papers.extend(fetched)
+    # 2. Cache Miss: Fetch from ArXiv (topics in parallel)
+    results = await asyncio.gather(
+        *(arxiv_service.search_papers(t, max_results=5) for t in topics[:3]),  # Fetch a few more to populate cache well
+        return_exceptions=True,
+    )
+    all_papers: list[dict[str, Any]] = [
+        p for fetched in results if not isinstance(fetched, BaseException) for p in fetched
+    ]
 
     unique_papers = _deduplicate(all_papers)
     formatted_papers = [_format_for_response(p) for p in unique_papers]
 
     # 3. Update Cache (Upsert)
     try:
-        sb.table("recommendation_cache").upsert({
+        await sb.table("recommendation_cache").upsert({
             "interests": cache_key,
-            "papers": formatted_papers,
+            "papers": formatted_papers[:_MAX_LIMIT],
             "created_at": datetime.utcnow().isoformat()
         }).execute()
         logger.info("Updated paper cache for: %s", cache_key)
     except Exception as exc:
         logger.error("Failed to update cache: %s", exc)
 
-    # 4. Background Ingestion
+    # 4. Background Ingestion — detached tasks, so the response never waits on it
+    state = request.app.state
     for paper in unique_papers[:limit]:
-        background_tasks.add_task(ingestion_service.ingest_paper, paper)
+        task = asyncio.create_task(_ingest_bounded(state.ingest_sem, paper))
+        state.ingest_tasks.add(task)
+        task.add_done_callback(state.ingest_tasks.discard)
 
     return formatted_papers[:limit]
@@ -5,15 +5,22 @@ Projects router — CRUD + per-project notes.
 from __future__ import annotations
 
 import uuid
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
 from fastapi import APIRouter, HTTPException, Header, Depends
 from pydantic import BaseModel
-from app.core.supabase import get_supabase
+from app.core.responses import trusted_json
+from app.core.supabase import supabase_dep
+
+if TYPE_CHECKING:
+    from supabase import AsyncClient
 
 router = APIRouter()
 
-async def get_current_user_id(authorization: str = Header(None)) -> str:
+async def get_current_user_id(
+    authorization: str = Header(None),
+    sb: AsyncClient = Depends(supabase_dep),
+) -> str:
     """
     Extract user ID from Supabase JWT.
     Simplification: used to filter queries.
@@ -26,8 +33,7 @@ async def get_current_user_id(authorization: str = Header(None)) -> str:
     try:
         # Strip 'Bearer ' if present
         token = authorization.replace("Bearer ", "")
-        sb = get_supabase()
-        user = sb.auth.get_user(token)
+        user = await sb.auth.get_user(token)
         if not user or not user.user:
              return "00000000-0000-0000-0000-000000000000"
         return str(user.user.id)
@@ -64,20 +70,23 @@ class NoteResponse(BaseModel):
     created_at: str
 
 
+# Select only the columns the response models expose
+_PROJECT_COLUMNS = ",".join(ProjectResponse.model_fields)
+_NOTE_COLUMNS = ",".join(NoteResponse.model_fields)
+
+
 # ── Project endpoints ─────────────────────────────────────────────────────
 @router.get("/", response_model=list[ProjectResponse])
-async def list_projects(user_id: str = Depends(get_current_user_id)):
+async def list_projects(user_id: str = Depends(get_current_user_id), sb: AsyncClient = Depends(supabase_dep)):
     """Return all projects for the authenticated user."""
-    sb = get_supabase()
-    resp = sb.table("research_projects").select("*").eq("user_id", user_id).order("created_at", desc=True).execute()
-    return resp.data
+    resp = await sb.table("research_projects").select(_PROJECT_COLUMNS).eq("user_id", user_id).order("created_at", desc=True).execute()
+    return trusted_json(resp.data)
 
 
 @router.post("/", response_model=ProjectResponse)
-async def create_project(body: ProjectCreate, user_id: str = Depends(get_current_user_id)):
+async def create_project(body: ProjectCreate, user_id: str = Depends(get_current_user_id), sb: AsyncClient = Depends(supabase_dep)):
     """Create a new research project."""
-    sb = get_supabase()
-    resp = sb.table("research_projects").insert({
+    resp = await sb.table("research_projects").insert({
         "user_id": user_id,
         "title": body.title,
         "description": body.description,
@@ -88,10 +97,9 @@ async def create_project(body: ProjectCreate, user_id: str = Depends(get_current
 
 
 @router.get("/{project_id}", response_model=ProjectResponse)
-async def get_project(project_id: str, user_id: str = Depends(get_current_user_id)):
+async def get_project(project_id: str, user_id: str = Depends(get_current_user_id), sb: AsyncClient = Depends(supabase_dep)):
     """Return a single project by ID."""
-    sb = get_supabase()
-    resp = sb.table("research_projects").select("*").eq("id", project_id).eq("user_id", user_id).single().execute()
+    resp = await sb.table("research_projects").select(_PROJECT_COLUMNS).eq("id", project_id).eq("user_id", user_id).single().execute()
     if not resp.data:
         raise HTTPException(status_code=404, detail="Project not found")
     return resp.data
@@ -99,18 +107,16 @@ async def get_project(project_id: str, user_id: str = Depends(get_current_user_i
 
 # ── Notes endpoints ───────────────────────────────────────────────────────
 @router.get("/{project_id}/notes", response_model=list[NoteResponse])
-async def get_project_notes(project_id: str, user_id: str = Depends(get_current_user_id)):
+async def get_project_notes(project_id: str, user_id: str = Depends(get_current_user_id), sb: AsyncClient = Depends(supabase_dep)):
     """Fetch all notes for a project."""
-    sb = get_supabase()
-    resp = sb.table("project_notes").select("*").eq("project_id", project_id).eq("user_id", user_id).order("created_at", desc=False).execute()
-    return resp.data
+    resp = await sb.table("project_notes").select(_NOTE_COLUMNS).eq("project_id", project_id).eq("user_id", user_id).order("created_at", desc=False).execute()
+    return trusted_json(resp.data)
 
 
 @router.post("/{project_id}/notes", response_model=NoteResponse)
-async def add_project_note(project_id: str, body: NoteCreate, user_id: str = Depends(get_current_user_id)):
+async def add_project_note(project_id: str, body: NoteCreate, user_id: str = Depends(get_current_user_id), sb: AsyncClient = Depends(supabase_dep)):
     """Save a note to a project."""
-    sb = get_supabase()
-    resp = sb.table("project_notes").insert({
+    resp = await sb.table("project_notes").insert({
         "project_id": project_id,
         "user_id": user_id,
         "content": body.content,
@@ -123,8 +129,7 @@ async def add_project_note(project_id: str, body: NoteCreate, user_id: str = Dep
 
 
 @router.delete("/{project_id}/notes/{note_id}")
-async def delete_project_note(project_id: str, note_id: str, user_id: str = Depends(get_current_user_id)):
+async def delete_project_note(project_id: str, note_id: str, user_id: str = Depends(get_current_user_id), sb: AsyncClient = Depends(supabase_dep)):
     """Delete a note from a project."""
-    sb = get_supabase()
-    sb.table("project_notes").delete().eq("id", note_id).eq("user_id", user_id).execute()
+    await sb.table("project_notes").delete().eq("id", note_id).eq("user_id", user_id).execute()
     return {"deleted": True}
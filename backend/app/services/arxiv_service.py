@@ -7,18 +7,31 @@ from __future__ import annotations
 
 import asyncio
 import logging
-from typing import Any
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any
 
-import arxiv
+if TYPE_CHECKING:
+    import arxiv
 
 logger = logging.getLogger(__name__)
 
-# Shared client with rate-limit-friendly settings
-_client = arxiv.Client(
-    page_size=10,
-    delay_seconds=3.0,   # be a good citizen
-    num_retries=3,
-)
+
+# One search at a time through the shared client: arxiv.Client spaces its own requests
+# `delay_seconds` apart (arXiv's 1 request / 3s policy) but isn't thread-safe, so
+# serialising here keeps that spacing process-wide, agent searches included.
+_search_sem = asyncio.Semaphore(1)
+
+
+@lru_cache(maxsize=1)
+def _get_client() -> "arxiv.Client":
+    """Shared client with rate-limit-friendly settings."""
+    import arxiv
+
+    return arxiv.Client(
+        page_size=10,
+        delay_seconds=3.0,   # be a good citizen
+        num_retries=3,
+    )
 
 
 def _build_paper_dict(result: arxiv.Result) -> dict[str, Any]:
@@ -41,18 +54,21 @@ async def search_papers(query: str, max_results: int = 5) -> list[dict[str, Any]
     Runs the blocking arxiv call in a thread pool so it doesn't block the event loop.
     """
     def _sync_search() -> list[dict[str, Any]]:
+        import arxiv
+
         search = arxiv.Search(
             query=query,
             max_results=max_results,
             sort_by=arxiv.SortCriterion.Relevance,
         )
         results = []
-        for result in _client.results(search):
+        for result in _get_client().results(search):
             results.append(_build_paper_dict(result))
         return results
 
     try:
-        papers = await asyncio.get_event_loop().run_in_executor(None, _sync_search)
+        async with _search_sem:
+            papers = await asyncio.get_event_loop().run_in_executor(None, _sync_search)
         logger.info("✅ ArXiv: fetched %d papers for query '%s'", len(papers), query)
         return papers
     except Exception as exc:
@@ -7,22 +7,26 @@ from __future__ import annotations
 
 import asyncio
 import logging
-
-from google import genai
-from google.genai import types
+from functools import lru_cache
+from typing import TYPE_CHECKING
 
 from app.core.config import settings
 
+if TYPE_CHECKING:
+    from google import genai
+
 logger = logging.getLogger(__name__)
 
-_client: genai.Client | None = None
+_EMBED_BATCH_MAX = 100        # Gemini rejects batch embed requests with more inputs
+_FALLBACK_CONCURRENCY = 4     # single-text requests in flight when a batch fails
+
 
+@lru_cache(maxsize=1)
+def _get_client() -> "genai.Client":
+    # Imported lazily so processes that never embed don't pay for the SDK
+    from google import genai
 
-def _get_client() -> genai.Client:
-    global _client
-    if _client is None:
-        _client = genai.Client(api_key=settings.GEMINI_API_KEY)
-    return _client
+    return genai.Client(api_key=settings.GEMINI_API_KEY)
 
 
 async def embed_text(text: str) -> list[float]:
@@ -32,6 +36,8 @@ async def embed_text(text: str) -> list[float]:
     Runs synchronously in a thread pool to avoid blocking the event loop.
     """
     def _sync_embed() -> list[float]:
+        from google.genai import types
+
         client = _get_client()
         result = client.models.embed_content(
             model="text-embedding-004",
@@ -46,3 +52,46 @@ async def embed_text(text: str) -> list[float]:
     except Exception as exc:
         logger.error("Embedding failed: %s", exc)
         return []
+
+
+async def embed_texts(texts: list[str]) -> list[list[float]]:
+    """
+    Embed several strings with batched Gemini requests (the API accepts a list of
+    contents, up to _EMBED_BATCH_MAX per request).
+    Returns one 768-float list per input, in input order.
+    """
+    embeddings: list[list[float]] = []
+    for i in range(0, len(texts), _EMBED_BATCH_MAX):
+        embeddings.extend(await _embed_batch(texts[i:i + _EMBED_BATCH_MAX]))
+    return embeddings
+
+
+async def _embed_batch(texts: list[str]) -> list[list[float]]:
+    """
+    One batch request for at most _EMBED_BATCH_MAX texts.
+    Falls back to single-text calls, _FALLBACK_CONCURRENCY at a time, if it fails.
+    """
+    def _sync_embed_batch() -> list[list[float]]:
+        from google.genai import types
+
+        client = _get_client()
+        result = client.models.embed_content(
+            model="text-embedding-004",
+            contents=texts,
+            config=types.EmbedContentConfig(task_type="RETRIEVAL_DOCUMENT"),
+        )
+        return [e.values for e in result.embeddings]
+
+    try:
+        return await asyncio.get_event_loop().run_in_executor(None, _sync_embed_batch)
+    except Exception as exc:
+        logger.warning("Batch embedding of %d texts failed (%s) — falling back to per-text calls", len(texts), exc)
+
+    # Created per call rather than at module level, so it never binds to a stale event loop
+    sem = asyncio.Semaphore(_FALLBACK_CONCURRENCY)
+
+    async def _bounded(text: str) -> list[float]:
+        async with sem:
+            return await embed_text(text)
+
+    return list(await asyncio.gather(*map(_bounded, texts)))
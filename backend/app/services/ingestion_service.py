@@ -5,40 +5,62 @@ Ingestion service — full pipeline:
 
 from __future__ import annotations
 
+import asyncio
 import logging
 from typing import Any
 
-from app.core.supabase import get_supabase_admin
+from app.core.supabase import get_supabase_admin, sb_call
+from app.core.ttl_cache import TTLCache
 from app.services import embedding_service, neo4j_service
 
 logger = logging.getLogger(__name__)
 
+# Cap rows per paper_chunks insert so long documents don't become one huge request body
+_CHUNK_INSERT_BATCH = 500
+_chunk_insert_sem = asyncio.Semaphore(4)
+
 # ── Text chunking ────────────────────────────────────────────────────────────
 
 def _chunk_text(text: str, chunk_size: int = 512, overlap: int = 64) -> list[str]:
     """Split text into overlapping chunks of ~chunk_size characters."""
-    chunks: list[str] = []
-    start = 0
-    while start < len(text):
-        end = start + chunk_size
-        chunks.append(text[start:end])
-        start += chunk_size - overlap
-    return chunks
+    return [text[start:start + chunk_size] for start in range(0, len(text), chunk_size - overlap)]
 
 
 # ── Paper existence check (Supabase) ─────────────────────────────────────────
 
+# Only hits are cached: a miss can turn into a hit once another worker inserts the paper.
+# The TTL bounds how long a row deleted out-of-band (e.g. to force re-ingestion) is
+# still reported as present. Capped at 50k ids, least recently used evicted first.
+_exists_cache: TTLCache[str, bool] = TTLCache(maxsize=50_000, ttl=3600)
+
+
 async def paper_exists_in_db(arxiv_id: str) -> bool:
-    """Return True if the paper is already in the Supabase `papers` table."""
+    """
+    Return True if the paper is already in the Supabase `papers` table.
+    Known ids are answered from an in-process TTL cache without a round-trip.
+    """
+    if _exists_cache.get(arxiv_id):
+        return True
+
     client = get_supabase_admin()
-    result = (
+    result = await sb_call(lambda: (
         client.table("papers")
         .select("id")
         .eq("arxiv_id", arxiv_id)
         .limit(1)
         .execute()
-    )
-    return len(result.data) > 0
+    ))
+    if result.data:
+        _exists_cache.set(arxiv_id, True)
+        return True
+    _exists_cache.pop(arxiv_id)
+    return False
+
+
+async def _insert_chunks(client, rows: list[dict[str, Any]]) -> None:
+    """Insert one batch of paper_chunks rows, at most 4 batches in flight across all ingests."""
+    async with _chunk_insert_sem:
+        await sb_call(lambda: client.table("paper_chunks").insert(rows).execute())
 
 
 # ── Main ingestion entry point ────────────────────────────────────────────────
@@ -60,7 +82,7 @@ async def ingest_paper(paper: dict[str, Any]) -> str | None:
 
     # 2. Save paper metadata to Supabase `papers` table
     client = get_supabase_admin()
-    insert_result = (
+    insert_result = await sb_call(lambda: (
         client.table("papers")
         .insert({
             "arxiv_id": arxiv_id,
@@ -72,13 +94,14 @@ async def ingest_paper(paper: dict[str, Any]) -> str | None:
             "categories": paper.get("categories", []),
         })
         .execute()
-    )
+    ))
 
     if not insert_result.data:
         logger.error("Failed to insert paper %s into Supabase", arxiv_id)
         return None
 
     paper_row_id: str = insert_result.data[0]["id"]
+    _exists_cache.set(arxiv_id, True)
     logger.info("✅ Paper %s inserted — DB id: %s", arxiv_id, paper_row_id)
 
     # 3. Chunk the abstract (full text will come later with Docling)
@@ -87,18 +110,23 @@ async def ingest_paper(paper: dict[str, Any]) -> str | None:
         logger.warning("Paper %s has no abstract — skipping chunking", arxiv_id)
     else:
         chunks = _chunk_text(abstract)
-        chunk_rows = []
-        for i, chunk in enumerate(chunks):
-            embedding = await embedding_service.embed_text(chunk)
-            chunk_rows.append({
+        # One embedding request for the whole abstract instead of one per chunk
+        embeddings = await embedding_service.embed_texts(chunks)
+        chunk_rows = [
+            {
                 "paper_id": paper_row_id,
                 "chunk_index": i,
                 "content": chunk,
                 "embedding": embedding,
-            })
+            }
+            for i, (chunk, embedding) in enumerate(zip(chunks, embeddings))
+        ]
 
         if chunk_rows:
-            client.table("paper_chunks").insert(chunk_rows).execute()
+            await asyncio.gather(*(
+                _insert_chunks(client, chunk_rows[i:i + _CHUNK_INSERT_BATCH])
+                for i in range(0, len(chunk_rows), _CHUNK_INSERT_BATCH)
+            ))
             logger.info("✅ Saved %d chunks for paper %s", len(chunk_rows), arxiv_id)
 
     # 4. Upsert Paper + Author nodes in Neo4j
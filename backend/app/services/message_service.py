@@ -0,0 +1,78 @@
+"""
+Message service — persists chat messages off the request path.
+
+The research SSE handler queues rows with `enqueue()`; a single worker started
+in the app lifespan (`drain_messages`) batches them into one Supabase insert
+per ~200ms window, so streaming never waits on Supabase I/O.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any
+
+from app.core.supabase import get_async_supabase
+
+logger = logging.getLogger(__name__)
+
+TABLE = "chat_messages"
+
+_BATCH_MAX = 128          # rows per insert
+_FLUSH_INTERVAL_S = 0.2   # max time a row waits for batch mates
+
+
+def enqueue(
+    queue: asyncio.Queue,
+    project_id: str,
+    msg_type: str,
+    content: str | None = None,
+    metadata: dict[str, Any] | None = None,
+) -> None:
+    """Queue one message for persistence. Drops it (with a warning) if the queue is full."""
+    try:
+        queue.put_nowait({
+            "project_id": project_id,
+            "msg_type":   msg_type,
+            "content":    content,
+            "metadata":   metadata,
+        })
+    except asyncio.QueueFull:
+        logger.warning("Message queue full — dropping %s message for %s", msg_type, project_id)
+
+
+async def _insert(rows: list[dict[str, Any]]) -> None:
+    """Insert a batch of rows in one call; failures are logged, never raised."""
+    try:
+        sb = await get_async_supabase()
+        await sb.table(TABLE).insert(rows).execute()
+    except Exception as exc:
+        logger.error("Failed to persist %d chat messages: %s", len(rows), exc)
+
+
+async def drain_messages(queue: asyncio.Queue) -> None:
+    """
+    Worker loop: wait for a row, collect up to _BATCH_MAX more within
+    _FLUSH_INTERVAL_S, then insert them together. Runs until cancelled.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        rows = [await queue.get()]
+        deadline = loop.time() + _FLUSH_INTERVAL_S
+        try:
+            while len(rows) < _BATCH_MAX and (timeout := deadline - loop.time()) > 0:
+                rows.append(await asyncio.wait_for(queue.get(), timeout))
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            # Also runs on cancellation, so rows already collected aren't lost
+            await _insert(rows)
+
+
+async def flush_messages(queue: asyncio.Queue) -> None:
+    """Insert whatever is still queued (called on shutdown after the worker stops)."""
+    rows = []
+    while not queue.empty():
+        rows.append(queue.get_nowait())
+    for i in range(0, len(rows), _BATCH_MAX):
+        await _insert(rows[i:i + _BATCH_MAX])
@@ -5,14 +5,17 @@ Graph model:
   (:Paper {arxiv_id, title, published, abstract_snippet, pdf_url, categories})
   (:Author {name})
   (:Author)-[:AUTHORED]->(:Paper)
+  (:Paper)-[:RELATED_TO {query}]->(:Paper)
+  (:Project {project_id})-[:EXPLORED]->(:Paper)
 """
 
 from __future__ import annotations
 
 import logging
-from typing import Any
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
 
-from neo4j import AsyncGraphDatabase, AsyncDriver
+from neo4j import AsyncGraphDatabase, AsyncDriver, AsyncSession, unit_of_work
 
 from app.core.config import settings
 
@@ -27,10 +30,26 @@ async def get_driver() -> AsyncDriver:
         _driver = AsyncGraphDatabase.driver(
             settings.NEO4J_URI,
             auth=(settings.NEO4J_USER, settings.NEO4J_PASSWORD),
+            max_connection_pool_size=50,
+            connection_acquisition_timeout=60,
         )
     return _driver
 
 
+@asynccontextmanager
+async def session_scope(session: AsyncSession | None = None) -> AsyncIterator[AsyncSession]:
+    """
+    Yield `session` if the caller already has one, else open (and close) a fresh one.
+    Lets batch callers run several helpers on a single session.
+    """
+    if session is not None:
+        yield session
+        return
+    driver = await get_driver()
+    async with driver.session(database=settings.NEO4J_DATABASE) as new_session:
+        yield new_session
+
+
 async def close_driver() -> None:
     global _driver
     if _driver:
@@ -39,7 +58,7 @@ async def close_driver() -> None:
 
 
 async def setup_constraints() -> None:
-    """Create uniqueness constraints (idempotent — safe to call on every startup)."""
+    """Create uniqueness constraints and indexes (idempotent — safe to call on every startup)."""
     driver = await get_driver()
     async with driver.session(database=settings.NEO4J_DATABASE) as session:
         await session.run(
@@ -50,58 +69,136 @@ async def setup_constraints() -> None:
             "CREATE CONSTRAINT author_name IF NOT EXISTS "
             "FOR (a:Author) REQUIRE a.name IS UNIQUE"
         )
+        # Every graph write MERGEs the Project node — without this it's a label scan
+        await session.run(
+            "CREATE CONSTRAINT project_id IF NOT EXISTS "
+            "FOR (proj:Project) REQUIRE proj.project_id IS UNIQUE"
+        )
+        await session.run(
+            "CREATE INDEX paper_published IF NOT EXISTS "
+            "FOR (p:Paper) ON (p.published)"
+        )
     logger.info("✅ Neo4j constraints ready")
 
 
-async def upsert_paper(paper: dict[str, Any]) -> None:
-    """MERGE a Paper node and its Author relationships into Neo4j."""
-    driver = await get_driver()
-    async with driver.session(database=settings.NEO4J_DATABASE) as session:
-        # Upsert the paper node
-        await session.run(
-            """
-            MERGE (p:Paper {arxiv_id: $arxiv_id})
-            SET p.title            = $title,
-                p.published        = $published,
-                p.abstract_snippet = $abstract_snippet,
-                p.pdf_url          = $pdf_url,
-                p.categories       = $categories
-            """,
+# ── Cypher ────────────────────────────────────────────────────────────────
+# Static query text lives here so it's built once, and every write/read runs as a
+# transaction function with a server-side timeout — a stuck Aura transaction is
+# terminated instead of holding a pooled connection indefinitely.
+_TX_TIMEOUT_S = 10.0
+
+# UNWIND of an empty author list yields no rows, but the paper MERGE/SET still applies
+_Q_UPSERT_PAPER = """
+MERGE (p:Paper {arxiv_id: $arxiv_id})
+SET p += $props
+WITH p
+UNWIND $authors AS name
+MERGE (a:Author {name: name})
+MERGE (a)-[:AUTHORED]->(p)
+"""
+
+_Q_MERGE_AUTHORS = "UNWIND $authors AS name MERGE (:Author {name: name})"
+
+# Runs after _Q_MERGE_AUTHORS, so authors are only MATCHed here. The trailing UNWIND
+# drops author-less rows, but only after their paper and EXPLORED edge are written.
+_Q_BULK_UPSERT_PAPERS = """
+MERGE (proj:Project {project_id: $project_id})
+WITH proj
+UNWIND $rows AS r
+MERGE (p:Paper {arxiv_id: r.arxiv_id})
+SET p += r.props
+MERGE (proj)-[:EXPLORED]->(p)
+WITH p, r
+UNWIND r.authors AS name
+MATCH (a:Author {name: name})
+MERGE (a)-[:AUTHORED]->(p)
+"""
+
+_Q_PAPER_EXISTS = "MATCH (p:Paper {arxiv_id: $arxiv_id}) RETURN count(p) AS cnt"
+
+_Q_LINK_RELATED = """
+UNWIND $pairs AS pair
+MATCH (a:Paper {arxiv_id: pair.a}), (b:Paper {arxiv_id: pair.b})
+MERGE (a)-[r:RELATED_TO]->(b)
+SET r.query = $query,
+    r.updated = timestamp()
+"""
+
+
+def _paper_props(paper: dict[str, Any]) -> dict[str, Any]:
+    """Paper node properties (everything except the arxiv_id key)."""
+    return {
+        "title": paper["title"],
+        "published": paper.get("published", ""),
+        "abstract_snippet": (paper.get("abstract") or "")[:300],
+        "pdf_url": paper.get("pdf_url", ""),
+        "categories": paper.get("categories", []),
+    }
+
+
+async def upsert_paper(paper: dict[str, Any], session: AsyncSession | None = None) -> None:
+    """MERGE a Paper node and its Author relationships into Neo4j (one query)."""
+    @unit_of_work(timeout=_TX_TIMEOUT_S)
+    async def _upsert(tx) -> None:
+        result = await tx.run(
+            _Q_UPSERT_PAPER,
             arxiv_id=paper["arxiv_id"],
-            title=paper["title"],
-            published=paper.get("published", ""),
-            abstract_snippet=(paper.get("abstract") or "")[:300],
-            pdf_url=paper.get("pdf_url", ""),
-            categories=paper.get("categories", []),
+            props=_paper_props(paper),
+            authors=paper.get("authors", []),
         )
+        await result.consume()
+
+    async with session_scope(session) as s:
+        await s.execute_write(_upsert)
 
-        # Upsert each author and create AUTHORED relationship
-        for author_name in paper.get("authors", []):
-            await session.run(
-                """
-                MERGE (a:Author {name: $name})
-                WITH a
-                MATCH (p:Paper {arxiv_id: $arxiv_id})
-                MERGE (a)-[:AUTHORED]->(p)
-                """,
-                name=author_name,
-                arxiv_id=paper["arxiv_id"],
-            )
-
-
-async def paper_exists(arxiv_id: str) -> bool:
+
+async def bulk_upsert_papers(
+    papers: list[dict[str, Any]],
+    project_id: str,
+    session: AsyncSession | None = None,
+) -> None:
+    """
+    Upsert a whole fetch batch in one transaction: Paper nodes, their Authors and
+    AUTHORED edges, and the Project -[:EXPLORED]-> Paper edges.
+    """
+    if not papers:
+        return
+    rows = [
+        {"arxiv_id": p["arxiv_id"], "props": _paper_props(p), "authors": p.get("authors", [])}
+        for p in papers
+    ]
+    # Each author is MERGEd once per batch even if they wrote several of the papers;
+    # sorted so concurrent batches take Author locks in the same order
+    authors = sorted({name for r in rows for name in r["authors"]})
+
+    @unit_of_work(timeout=_TX_TIMEOUT_S)
+    async def _bulk(tx) -> None:
+        result = await tx.run(_Q_MERGE_AUTHORS, authors=authors)
+        await result.consume()
+        result = await tx.run(_Q_BULK_UPSERT_PAPERS, rows=rows, project_id=project_id)
+        await result.consume()
+
+    async with session_scope(session) as s:
+        await s.execute_write(_bulk)
+
+
+async def paper_exists(arxiv_id: str, session: AsyncSession | None = None) -> bool:
     """Check if a Paper node already exists in the graph."""
-    driver = await get_driver()
-    async with driver.session(database=settings.NEO4J_DATABASE) as session:
-        result = await session.run(
-            "MATCH (p:Paper {arxiv_id: $arxiv_id}) RETURN count(p) AS cnt",
-            arxiv_id=arxiv_id,
-        )
+    @unit_of_work(timeout=_TX_TIMEOUT_S)
+    async def _exists(tx) -> bool:
+        result = await tx.run(_Q_PAPER_EXISTS, arxiv_id=arxiv_id)
         record = await result.single()
         return bool(record and record["cnt"] > 0)
 
+    async with session_scope(session) as s:
+        return await s.execute_read(_exists)
+
 
-async def link_related_papers(arxiv_ids: list[str], query: str) -> None:
+async def link_related_papers(
+    arxiv_ids: list[str],
+    query: str,
+    session: AsyncSession | None = None,
+) -> None:
     """
     Create bidirectional RELATED_TO edges between all papers in the same
     fetch batch. This builds the knowledge graph so topics can be connected later.
@@ -109,35 +206,14 @@ async def link_related_papers(arxiv_ids: list[str], query: str) -> None:
     """
     if len(arxiv_ids) < 2:
         return
-    driver = await get_driver()
-    async with driver.session(database=settings.NEO4J_DATABASE) as session:
-        for i, id_a in enumerate(arxiv_ids):
-            for id_b in arxiv_ids[i + 1:]:
-                await session.run(
-                    """
-                    MATCH (a:Paper {arxiv_id: $id_a}), (b:Paper {arxiv_id: $id_b})
-                    MERGE (a)-[r:RELATED_TO]->(b)
-                    SET r.query = $query,
-                        r.updated = timestamp()
-                    """,
-                    id_a=id_a, id_b=id_b, query=query,
-                )
-    logger.info("🔗 Graph: linked %d papers under query '%s'", len(arxiv_ids), query)
+    # All pairs go to the server in one UNWIND query — one round-trip instead of N*(N-1)/2
+    pairs = [{"a": a, "b": b} for i, a in enumerate(arxiv_ids) for b in arxiv_ids[i + 1:]]
 
+    @unit_of_work(timeout=_TX_TIMEOUT_S)
+    async def _link(tx) -> None:
+        result = await tx.run(_Q_LINK_RELATED, pairs=pairs, query=query)
+        await result.consume()
 
-async def upsert_project_paper(project_id: str, arxiv_id: str) -> None:
-    """
-    Create a Project node (if not exists) and link it to a Paper via EXPLORED edge.
-    Lets us later ask 'which papers has project X seen?'
-    """
-    driver = await get_driver()
-    async with driver.session(database=settings.NEO4J_DATABASE) as session:
-        await session.run(
-            """
-            MERGE (proj:Project {project_id: $project_id})
-            WITH proj
-            MATCH (p:Paper {arxiv_id: $arxiv_id})
-            MERGE (proj)-[:EXPLORED]->(p)
-            """,
-            project_id=project_id, arxiv_id=arxiv_id,
-        )
+    async with session_scope(session) as s:
+        await s.execute_write(_link)
+    logger.info("🔗 Graph: linked %d papers under query '%s'", len(arxiv_ids), query)
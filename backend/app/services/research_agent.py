@@ -5,16 +5,18 @@ Streams SSE events: text | paper_artifact | suggestion_chips | done
 
 from __future__ import annotations
 
-import json
+import asyncio
 import logging
 import re
 from datetime import datetime
-from typing import Any, AsyncGenerator
+from typing import Any, AsyncGenerator, Callable
 
+import orjson
 from google import genai
 from google.genai import types
 
 from app.core.config import settings
+from app.core.responses import sse_frame
 from app.services import arxiv_service, web_search_service, neo4j_service
 
 logger = logging.getLogger(__name__)
@@ -105,23 +107,26 @@ def _assess_credibility(paper: dict[str, Any]) -> str:
     return "UNCERTAIN"
 
 
-def _score_paper(paper: dict[str, Any], query: str) -> float:
+# Paper fields the canvas renders (plus abstract_snippet + credibility added per artifact).
+# The full abstract stays server-side — it's the bulk of each paper_artifact otherwise.
+_FRONTEND_FIELDS = ("arxiv_id", "title", "authors", "published", "pdf_url", "categories")
+
+_CRED_BONUS = {"HIGH": 3.0, "MEDIUM": 1.5, "UNCERTAIN": 0.0}
+
+
+def _score_paper(paper: dict[str, Any], q_words: frozenset[str]) -> float:
     """
     Score a paper for relevance/quality (higher = better).
     Used to pick the top N from a larger fetch batch.
+    `q_words` is the lowercased query split into words, computed once per batch.
     """
-    score = 0.0
-    q_words = set(query.lower().split())
     title = (paper.get("title") or "").lower()
     abstract = (paper.get("abstract") or paper.get("abstract_snippet") or "").lower()
 
-    # Title keyword hits
-    score += sum(2.0 for w in q_words if w in title)
-    # Abstract keyword hits
-    score += sum(0.5 for w in q_words if w in abstract)
+    # Title / abstract keyword hits
+    score = 2.0 * sum(w in title for w in q_words) + 0.5 * sum(w in abstract for w in q_words)
     # Credibility bonus
-    cred = _assess_credibility(paper)
-    score += {"HIGH": 3.0, "MEDIUM": 1.5, "UNCERTAIN": 0.0}[cred]
+    score += _CRED_BONUS[_assess_credibility(paper)]
     # Slight recency bonus (but not too much — credibility already penalises too-new)
     published = paper.get("published") or ""
     try:
@@ -134,7 +139,8 @@ def _score_paper(paper: dict[str, Any], query: str) -> float:
 
 def _rank_papers(papers: list[dict[str, Any]], query: str, top_n: int = 3) -> list[dict[str, Any]]:
     """Return top_n papers sorted by score descending."""
-    scored = sorted(papers, key=lambda p: _score_paper(p, query), reverse=True)
+    q_words = frozenset(query.lower().split())
+    scored = sorted(papers, key=lambda p: _score_paper(p, q_words), reverse=True)
     return scored[:top_n]
 
 
@@ -146,17 +152,65 @@ async def _persist_to_graph(papers: list[dict[str, Any]], query: str, project_id
     Silently fails so the main stream is never interrupted.
     """
     try:
-        arxiv_ids: list[str] = []
-        for paper in papers:
-            await neo4j_service.upsert_paper(paper)
-            arxiv_ids.append(paper["arxiv_id"])
-            await neo4j_service.upsert_project_paper(project_id, paper["arxiv_id"])
-        await neo4j_service.link_related_papers(arxiv_ids, query)
+        async with neo4j_service.session_scope() as session:
+            await neo4j_service.bulk_upsert_papers(papers, project_id, session=session)
+            await neo4j_service.link_related_papers([p["arxiv_id"] for p in papers], query, session=session)
         logger.info("📊 Graph updated: %d papers for query '%s'", len(papers), query)
     except Exception as exc:
         logger.warning("Graph persist failed (non-fatal): %s", exc)
 
 
+# ── Graph write queue ─────────────────────────────────────────────────────
+# Fetch batches go on a queue created in the app lifespan (app.state.graph_queue)
+# and are written by one worker, so the SSE stream never shares a turn with Neo4j I/O.
+_GRAPH_BATCH_MAX = 16        # fetch batches per drain
+_GRAPH_FLUSH_INTERVAL_S = 0.2
+
+
+def enqueue_graph_write(queue: asyncio.Queue, papers: list[dict[str, Any]], query: str, project_id: str) -> None:
+    """Queue a fetch batch for graph persistence. Drops it (with a warning) if the queue is full."""
+    try:
+        queue.put_nowait((papers, query, project_id))
+    except asyncio.QueueFull:
+        logger.warning("Graph queue full — dropping %d papers for query '%s'", len(papers), query)
+
+
+async def _persist_batches(batches: list[tuple[list[dict[str, Any]], str, str]]) -> None:
+    await asyncio.gather(*(_persist_to_graph(*b) for b in batches))
+
+
+async def drain_graph_writes(queue: asyncio.Queue) -> None:
+    """
+    Worker loop: wait for a batch, collect up to _GRAPH_BATCH_MAX more within
+    _GRAPH_FLUSH_INTERVAL_S, then persist them concurrently. Runs until cancelled.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        batches = [await queue.get()]
+        deadline = loop.time() + _GRAPH_FLUSH_INTERVAL_S
+        try:
+            while len(batches) < _GRAPH_BATCH_MAX and (timeout := deadline - loop.time()) > 0:
+                batches.append(await asyncio.wait_for(queue.get(), timeout))
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            # Also runs on cancellation, so batches already collected aren't lost
+            await _persist_batches(batches)
+
+
+async def flush_graph_writes(queue: asyncio.Queue) -> None:
+    """Persist whatever is still queued (called on shutdown after the worker stops)."""
+    batches = []
+    while not queue.empty():
+        batches.append(queue.get_nowait())
+    if batches:
+        await _persist_batches(batches)
+
+
+_CHIPS_MARKER = "[CHIPS"
+_CHIPS_RE = re.compile(r'\[CHIPS:\s*(\[.*?\])\]', re.DOTALL)
+
+
 # ── Model fallback list (tried in order) ─────────────────────────────────
 _MODELS = [
     "gemini-flash-latest",       # gemini-1.5-flash
@@ -165,71 +219,157 @@ _MODELS = [
 ]
 
 
-def _generate_with_retry(client: genai.Client, contents, config, max_retries: int = 3):
+def _is_retryable(exc: Exception) -> bool:
+    msg = str(exc)
+    return "503" in msg or "UNAVAILABLE" in msg or "429" in msg or "RESOURCE_EXHAUSTED" in msg
+
+
+async def _generate_with_retry(client: genai.Client, contents, config, max_retries: int = 3):
     """Try each model in _MODELS with exponential backoff on 429/503."""
-    import time
     last_exc: Exception | None = None
 
     for model in _MODELS:
         for attempt in range(max_retries):
             try:
-                return client.models.generate_content(
+                return await client.aio.models.generate_content(
                     model=model,
                     contents=contents,
                     config=config,
                 )
             except Exception as exc:
-                msg = str(exc)
-                if "503" in msg or "UNAVAILABLE" in msg or "429" in msg or "RESOURCE_EXHAUSTED" in msg:
-                    wait = 2 ** attempt          # 1s, 2s, 4s
-                    logger.warning("Model %s attempt %d failed (%s), retrying in %ds…", model, attempt + 1, exc.__class__.__name__, wait)
-                    time.sleep(wait)
-                    last_exc = exc
-                    continue
-                raise  # non-retryable — propagate immediately
+                if not _is_retryable(exc):
+                    raise  # non-retryable — propagate immediately
+                wait = 2 ** attempt          # 1s, 2s, 4s
+                logger.warning("Model %s attempt %d failed (%s), retrying in %ds…", model, attempt + 1, exc.__class__.__name__, wait)
+                await asyncio.sleep(wait)
+                last_exc = exc
+        logger.warning("All retries exhausted for model %s, trying next…", model)
+
+    raise last_exc or RuntimeError("All models and retries exhausted")
+
+
+async def _stream_with_retry(client: genai.Client, contents, config, max_retries: int = 3):
+    """
+    Open a streaming generation, trying each model in _MODELS with backoff on 429/503.
+    The request is only sent on first iteration, so the retry wraps the first chunk;
+    once text is flowing, errors propagate. Returns (first_chunk, rest_of_stream).
+    """
+    last_exc: Exception | None = None
+
+    for model in _MODELS:
+        for attempt in range(max_retries):
+            try:
+                stream = await client.aio.models.generate_content_stream(
+                    model=model,
+                    contents=contents,
+                    config=config,
+                )
+                return await anext(stream), stream
+            except StopAsyncIteration:
+                return None, None
+            except Exception as exc:
+                if not _is_retryable(exc):
+                    raise
+                wait = 2 ** attempt          # 1s, 2s, 4s
+                logger.warning("Model %s stream attempt %d failed (%s), retrying in %ds…", model, attempt + 1, exc.__class__.__name__, wait)
+                await asyncio.sleep(wait)
+                last_exc = exc
         logger.warning("All retries exhausted for model %s, trying next…", model)
 
     raise last_exc or RuntimeError("All models and retries exhausted")
 
 
+def _chunk_text_of(chunk) -> str:
+    """Concatenated text parts of one streamed response chunk."""
+    if not chunk.candidates or not chunk.candidates[0].content:
+        return ""
+    return "".join(part.text for part in chunk.candidates[0].content.parts or () if part.text)
+
+
 # ── History windowing ─────────────────────────────────────────────────────
 _MAX_FULL_TURNS = 12      # keep last 12 messages in full
 _MAX_CHAR_OLDER  = 400    # truncate older assistant messages to this length
 
-def _window_history(history: list[dict[str, str]]) -> list[dict[str, str]]:
+_CONTEXT_NOTE = (
+    "\n\n[CONTEXT NOTE: Earlier messages in this conversation were truncated or omitted "
+    "to save tokens. The conversation topic and user preferences are preserved.]"
+)
+
+
+_TRUNC_SUFFIX = "… [truncated for context efficiency]"
+
+
+def _is_long_reply(msg: dict[str, str]) -> bool:
+    return msg.get("role") == "assistant" and len(msg.get("content", "")) > _MAX_CHAR_OLDER
+
+
+def _truncate_reply(content: str) -> str:
+    return content[:_MAX_CHAR_OLDER] + _TRUNC_SUFFIX
+
+
+def _window_history(history: list[dict[str, str]]) -> tuple[list[dict[str, str]], frozenset[int]]:
     """
     Keep the most recent _MAX_FULL_TURNS messages at full length.
     Older messages are kept but assistant content is truncated to _MAX_CHAR_OLDER chars
     to reduce token usage while preserving topic continuity.
-    A synthetic [CONTEXT] note is prepended if any truncation occurs.
+    Returns (history, truncated_indices); `history` itself comes back untouched when
+    nothing needs truncating. Callers add _CONTEXT_NOTE to the system prompt if any
+    entry was truncated.
     """
-    if len(history) <= _MAX_FULL_TURNS:
-        return history
-
     older = history[:-_MAX_FULL_TURNS]
-    recent = history[-_MAX_FULL_TURNS:]
-
-    compressed = []
-    truncated = False
-    for msg in older:
-        if msg.get("role") == "assistant" and len(msg.get("content", "")) > _MAX_CHAR_OLDER:
-            compressed.append({
-                "role": "assistant",
-                "content": msg["content"][:_MAX_CHAR_OLDER] + "… [truncated for context efficiency]",
-            })
-            truncated = True
-        else:
-            compressed.append(msg)
+    truncated = frozenset(i for i, msg in enumerate(older) if _is_long_reply(msg))
+    if not truncated:
+        return history, truncated
+
+    compressed = [
+        {
+            "role": "assistant",
+            "content": _truncate_reply(msg["content"]),
+        } if i in truncated else msg
+        for i, msg in enumerate(older)
+    ]
+    return compressed + history[-_MAX_FULL_TURNS:], truncated
+
+
+_TOKEN_BUDGET = 6000       # rough cap on history + new message sent to Gemini
+
 
-    if truncated:
-        # Inject a note at the start of the recent window so Gemini knows
-        compressed.append({
-            "role": "user",
-            "content": "[CONTEXT NOTE: Earlier assistant messages were summarised to save tokens. "
-                       "The conversation topic and user preferences are preserved above.]",
-        })
+def _est_tokens(text: str) -> int:
+    return len(text) // 4   # ~4 chars per token — a cheap estimate, good enough for a cap
 
-    return compressed + recent
+
+def _fit_token_budget(
+    history: list[dict[str, str]],
+    message: str,
+    truncated: frozenset[int] = frozenset(),
+) -> tuple[list[dict[str, str]], bool]:
+    """
+    Trim history, oldest first, until history + message fit in _TOKEN_BUDGET.
+    Long assistant replies are truncated to _MAX_CHAR_OLDER before any turn is
+    dropped (user turns carry the intent). `truncated` holds the indices
+    _window_history already shortened, so they aren't truncated twice.
+    Returns (history, trimmed).
+    """
+    total = _est_tokens(message) + sum(_est_tokens(m.get("content", "")) for m in history)
+    if total <= _TOKEN_BUDGET:
+        return history, False
+
+    fitted = list(history)
+    for i, msg in enumerate(fitted):
+        if total <= _TOKEN_BUDGET:
+            break
+        if i not in truncated and _is_long_reply(msg):
+            short = _truncate_reply(msg["content"])
+            total -= _est_tokens(msg["content"]) - _est_tokens(short)
+            fitted[i] = {"role": "assistant", "content": short}
+
+    drop = 0
+    while total > _TOKEN_BUDGET and drop < len(fitted):
+        total -= _est_tokens(fitted[drop].get("content", ""))
+        drop += 1
+
+    logger.info("History over token budget — trimmed to ~%d tokens (%d turns dropped)", total, drop)
+    return fitted[drop:], True
 
 
 # ── Main streaming generator ──────────────────────────────────────────────
@@ -238,14 +378,27 @@ async def run_research_stream(
     history: list[dict[str, str]],
     project_id: str,
     active_paper: dict[str, Any] | None = None,
-) -> AsyncGenerator[str, None]:
+    on_event: Callable[[dict[str, Any]], None] | None = None,
+    graph_queue: asyncio.Queue | None = None,
+) -> AsyncGenerator[bytes, None]:
     """
-    Async generator that yields SSE-formatted data lines.
+    Async generator that yields SSE-formatted data frames (bytes).
     Each line: `data: <json>\\n\\n`
 
     active_paper: if the user has a paper open in the viewer, its metadata is
     injected as additional system context so questions are answered in that frame.
+
+    on_event: called with each event dict just before it is encoded, so callers
+    (e.g. chat persistence) can observe the turn without parsing the frames.
+
+    graph_queue: the app's graph write queue; fetched papers are queued on it for
+    Neo4j persistence. Without one, nothing is written to the graph.
     """
+    def _emit(event: dict[str, Any]) -> bytes:
+        if on_event is not None:
+            on_event(event)
+        return sse_frame(event)
+
     client = _get_client()
 
     # Build dynamic system prompt (base + optional paper context)
@@ -269,7 +422,11 @@ async def run_research_stream(
         )
 
     # Apply smart history windowing before building contents
-    windowed_history = _window_history(history)
+    windowed_history, truncated = _window_history(history)
+    windowed_history, trimmed = _fit_token_budget(windowed_history, message, truncated)
+    if truncated or trimmed:
+        # A system-prompt suffix rather than an extra user turn in the conversation
+        system_prompt += _CONTEXT_NOTE
 
     # Build conversation contents
     contents: list[types.Content] = []
@@ -295,7 +452,7 @@ async def run_research_stream(
         # We loop until Gemini stops calling tools, then stream final text
         MAX_TOOL_ROUNDS = 3
         for _round in range(MAX_TOOL_ROUNDS):
-            resp = _generate_with_retry(client, contents, config)
+            resp = await _generate_with_retry(client, contents, config)
 
             candidate = resp.candidates[0]
             parts = candidate.content.parts if candidate.content else []
@@ -309,36 +466,47 @@ async def run_research_stream(
             # Append model's tool-call turn to history
             contents.append(candidate.content)
 
-            # Execute tools + yield artifacts
-            fn_responses: list[types.Part] = []
+            # Start every tool call first, then await them together — a fetch_papers
+            # and a search_web in the same turn no longer pay their latencies back-to-back
+            calls: list[tuple[str, str]] = []
+            pending = []
             for part in fn_calls:
                 fc = part.function_call
                 fn_name = fc.name
-                fn_args = dict(fc.args)
+                query = (fc.args or {}).get("query", message)
 
                 if fn_name == "fetch_papers":
-                    query = fn_args.get("query", message)
-
                     # Fetch a wider pool internally (10 papers)
-                    yield f"data: {json.dumps({'type': 'status', 'content': f'🔍 Scanning ArXiv for: {query}'})}\n\n"
-                    all_papers = await arxiv_service.search_papers(query, max_results=10)
+                    yield _emit({'type': 'status', 'content': f'🔍 Scanning ArXiv for: {query}'})
+                    pending.append(arxiv_service.search_papers(query, max_results=10))
+                elif fn_name == "search_web":
+                    yield _emit({'type': 'status', 'content': f'🌐 Verifying via web: {query}'})
+                    pending.append(web_search_service.search_web(query, max_results=3))
+                else:
+                    continue
+                calls.append((fn_name, query))
+
+            results = await asyncio.gather(*pending)
+
+            # Yield artifacts and build tool responses in the order Gemini asked
+            fn_responses: list[types.Part] = []
+            for (fn_name, query), result in zip(calls, results):
+                if fn_name == "fetch_papers":
+                    all_papers = result
 
                     # Rank and show only the best 3 to the user
                     top_papers = _rank_papers(all_papers, query, top_n=3)
-                    yield f"data: {json.dumps({'type': 'status', 'content': f'✅ Selected top {len(top_papers)} of {len(all_papers)} papers'})}\n\n"
+                    yield _emit({'type': 'status', 'content': f'✅ Selected top {len(top_papers)} of {len(all_papers)} papers'})
 
                     for paper in top_papers:
-                        credibility = _assess_credibility(paper)
-                        paper_with_snippet = {
-                            **paper,
-                            "abstract_snippet": (paper.get("abstract") or "")[:400],
-                            "credibility": credibility,
-                        }
-                        yield f"data: {json.dumps({'type': 'paper_artifact', 'paper': paper_with_snippet})}\n\n"
-
-                    # Silently persist ALL fetched papers to Neo4j graph (background task)
-                    import asyncio
-                    asyncio.ensure_future(_persist_to_graph(all_papers, query, project_id))
+                        payload = {k: paper.get(k) for k in _FRONTEND_FIELDS}
+                        payload["abstract_snippet"] = (paper.get("abstract") or "")[:400]
+                        payload["credibility"] = _assess_credibility(paper)
+                        yield _emit({'type': 'paper_artifact', 'paper': payload})
+
+                    # Silently persist ALL fetched papers to Neo4j graph (background worker)
+                    if graph_queue is not None:
+                        enqueue_graph_write(graph_queue, all_papers, query, project_id)
 
                     fn_responses.append(types.Part(
                         function_response=types.FunctionResponse(
@@ -347,16 +515,11 @@ async def run_research_stream(
                         )
                     ))
 
-                elif fn_name == "search_web":
-                    query = fn_args.get("query", message)
-                    yield f"data: {json.dumps({'type': 'status', 'content': f'🌐 Verifying via web: {query}'})}\n\n"
-
-                    web_results = await web_search_service.search_web(query, max_results=3)
-
+                else:  # search_web
                     fn_responses.append(types.Part(
                         function_response=types.FunctionResponse(
                             name=fn_name,
-                            response={"results": web_results},
+                            response={"results": result},
                         )
                     ))
 
@@ -367,7 +530,10 @@ async def run_research_stream(
             ))
 
         # ── Stream final text response ─────────────────────────────────
-        final_resp = _generate_with_retry(
+        # Text is forwarded as Gemini produces it. Everything from the [CHIPS marker
+        # on is held back, and so is a tail that could be the start of a split marker
+        # (plus any trailing whitespace, which is dropped if the marker follows it).
+        first, stream = await _stream_with_retry(
             client,
             contents,
             types.GenerateContentConfig(
@@ -377,36 +543,48 @@ async def run_research_stream(
         )
 
         raw_text = ""
-        if final_resp.candidates and final_resp.candidates[0].content:
-            for part in final_resp.candidates[0].content.parts:
-                if part.text:
-                    raw_text += part.text
+        sent = 0                  # raw_text[:sent] has been yielded
+        marker_at = -1
+        hold = len(_CHIPS_MARKER) - 1
+        chunk = first
+        while chunk is not None:
+            raw_text += _chunk_text_of(chunk)
+            if marker_at < 0:
+                marker_at = raw_text.find(_CHIPS_MARKER, sent)
+                # Trailing whitespace is held too: if the chips block follows, it's stripped
+                # like the rest of the block. Only the unsent tail is scanned, not raw_text.
+                end = marker_at if marker_at >= 0 else len(raw_text)
+                safe_end = sent + len(raw_text[sent:end].rstrip())
+                if marker_at < 0:
+                    safe_end = min(safe_end, len(raw_text) - hold)
+                if safe_end > sent:
+                    yield _emit({'type': 'text', 'content': raw_text[sent:safe_end]})
+                    sent = safe_end
+            chunk = await anext(stream, None)
 
         # Extract [CHIPS: [...]] block
         chips: list[str] = []
-        chips_match = re.search(r'\[CHIPS:\s*(\[.*?\])\]', raw_text, re.DOTALL)
+        chips_match = _CHIPS_RE.search(raw_text, marker_at) if marker_at >= 0 else None
         if chips_match:
             try:
-                chips = json.loads(chips_match.group(1))
-            except json.JSONDecodeError:
+                chips = orjson.loads(chips_match.group(1))
+            except orjson.JSONDecodeError:
                 pass
-            # Remove chips block from displayed text
-            raw_text = raw_text[:chips_match.start()].rstrip()
-
-        # Stream text in chunks (simulate streaming by splitting on newlines)
-        for line in raw_text.split('\n'):
-            yield f"data: {json.dumps({'type': 'text', 'content': line + chr(10)})}\n\n"
+        # Flush whatever is left: the held-back tail, or a malformed marker's text
+        tail = raw_text[sent:chips_match.start()].rstrip() if chips_match else raw_text[sent:]
+        if tail:
+            yield _emit({'type': 'text', 'content': tail})
 
         # Send chips
         if chips:
-            yield f"data: {json.dumps({'type': 'suggestion_chips', 'chips': chips})}\n\n"
+            yield _emit({'type': 'suggestion_chips', 'chips': chips})
         else:
             # Default chips if Gemini forgot
-            yield f"data: {json.dumps({'type': 'suggestion_chips', 'chips': ['Explain more simply', 'Find related papers', 'Compare approaches']})}\n\n"
+            yield _emit({'type': 'suggestion_chips', 'chips': ['Explain more simply', 'Find related papers', 'Compare approaches']})
 
     except Exception as exc:
         logger.error("Research agent error: %s", exc, exc_info=True)
-        yield f"data: {json.dumps({'type': 'error', 'content': f'Something went wrong: {exc}'})}\n\n"
+        yield _emit({'type': 'error', 'content': f'Something went wrong: {exc}'})
 
     finally:
-        yield f"data: {json.dumps({'type': 'done'})}\n\n"
+        yield _emit({'type': 'done'})
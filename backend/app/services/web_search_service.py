@@ -11,16 +11,70 @@ from typing import Any
 
 import httpx
 
+from app.core.ttl_cache import TTLCache
+
 logger = logging.getLogger(__name__)
 
 _DDG_URL = "https://api.duckduckgo.com/"
 
+_http: httpx.AsyncClient | None = None
+
+
+async def _get_http() -> httpx.AsyncClient:
+    """Shared client, so repeat searches reuse a pooled keep-alive connection to DDG."""
+    global _http
+    if _http is None:
+        _http = httpx.AsyncClient(
+            timeout=httpx.Timeout(8.0, connect=2.0),
+            limits=httpx.Limits(max_keepalive_connections=32, max_connections=64),
+        )
+    return _http
+
+
+async def close_http() -> None:
+    """Close the shared client (called from the app lifespan on shutdown)."""
+    global _http
+    if _http:
+        await _http.aclose()
+        _http = None
+
+
+# (query, max_results) -> results, 5-minute TTL, LRU-capped.
+# Only non-empty results are cached so a transient failure isn't remembered.
+_cache: TTLCache[tuple[str, int], list[dict[str, Any]]] = TTLCache(maxsize=1024, ttl=300)
+# Lookups currently on the wire — concurrent callers for the same key share one request
+_inflight: dict[tuple[str, int], asyncio.Task[list[dict[str, Any]]]] = {}
+
 
 async def search_web(query: str, max_results: int = 3) -> list[dict[str, Any]]:
     """
     Search the web via DuckDuckGo Instant Answer API.
     Returns up to max_results results with title, snippet, and url.
+    Results are cached for 5 minutes, and identical concurrent searches are coalesced.
     """
+    key = (query, max_results)
+    hit = _cache.get(key)
+    if hit is not None:
+        return list(hit)
+
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.create_task(_fetch(query, max_results))
+        _inflight[key] = task
+        task.add_done_callback(lambda t: _store(key, t))
+    # shield: one caller going away must not cancel the request the others are waiting on
+    return list(await asyncio.shield(task))
+
+
+def _store(key: tuple[str, int], task: asyncio.Task[list[dict[str, Any]]]) -> None:
+    _inflight.pop(key, None)
+    if task.cancelled() or task.exception() is not None or not task.result():
+        return
+    _cache.set(key, task.result())
+
+
+async def _fetch(query: str, max_results: int) -> list[dict[str, Any]]:
+    """One DuckDuckGo round-trip; failures are logged and give an empty list."""
     params = {
         "q": query,
         "format": "json",
@@ -29,10 +83,10 @@ async def search_web(query: str, max_results: int = 3) -> list[dict[str, Any]]:
     }
 
     try:
-        async with httpx.AsyncClient(timeout=8.0) as client:
-            resp = await client.get(_DDG_URL, params=params)
-            resp.raise_for_status()
-            data = resp.json()
+        client = await _get_http()
+        resp = await client.get(_DDG_URL, params=params)
+        resp.raise_for_status()
+        data = resp.json()
 
         results: list[dict[str, Any]] = []
 
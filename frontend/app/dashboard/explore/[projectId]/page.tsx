@@ -313,25 +313,6 @@ export default function CanvasPage() {
   const chatEndRef = useRef<HTMLDivElement>(null)
   const inputRef = useRef<HTMLTextAreaElement>(null)
 
-  // ── Persist a single message to Supabase ─────────────────────────────────
-  const persistMessage = async (type: string, content?: string, metadata?: Record<string, unknown>) => {
-    try {
-      const supabase = createClient()
-      const { data: { session } } = await supabase.auth.getSession()
-      
-      await fetch(`${API_URL}/api/v1/projects/${encodeURIComponent(projectId)}/messages`, {
-        method: 'POST',
-        headers: { 
-          'Content-Type': 'application/json',
-          'Authorization': `Bearer ${session?.access_token}`
-        },
-        body: JSON.stringify({ msg_type: type, content, metadata }),
-      })
-    } catch (e) {
-      console.warn('Failed to persist message:', e)
-    }
-  }
-
   // ── Notes persistence via API ────────────────────────────────────────────
   const loadNotes = useCallback(async () => {
     try {
@@ -373,13 +354,22 @@ export default function CanvasPage() {
         const supabase = createClient()
         const { data: { session } } = await supabase.auth.getSession()
 
-        const resp = await fetch(`${API_URL}/api/v1/projects/${encodeURIComponent(projectId)}/messages`, {
-          headers: {
-            'Authorization': `Bearer ${session?.access_token}`
-          }
-        })
-        if (!resp.ok) throw new Error('failed')
-        const rows: Array<{ id: number; msg_type: string; content?: string; metadata?: Record<string, unknown>; created_at: string }> = await resp.json()
+        type Row = { id: number; msg_type: string; content?: string; metadata?: Record<string, unknown>; created_at: string }
+        const rows: Row[] = []
+        // History is keyset-paginated server-side — follow next_after until it runs out
+        let after: number | null = null
+        do {
+          const query: string = after === null ? '' : `?after_id=${after}`
+          const resp = await fetch(`${API_URL}/api/v1/projects/${encodeURIComponent(projectId)}/messages${query}`, {
+            headers: {
+              'Authorization': `Bearer ${session?.access_token}`
+            }
+          })
+          if (!resp.ok) throw new Error('failed')
+          const page: { messages: Row[]; next_after: number | null } = await resp.json()
+          rows.push(...page.messages)
+          after = page.next_after
+        } while (after !== null)
 
         if (rows.length > 0) {
           // Restore messages from DB
@@ -466,24 +456,11 @@ export default function CanvasPage() {
     const assistantMsg: Message = { id: assistantId, type: 'assistant', content: '' }
     setMessages(m => [...m, userMsg, assistantMsg])
 
-    // Persist user message immediately
-    void persistMessage('user', text)
-
     const history = messages
       .filter(m => m.type === 'user' || m.type === 'assistant')
       .map(m => ({ role: m.type === 'user' ? 'user' : 'assistant', content: m.content ?? '' }))
 
-    // Collect new messages to persist after stream ends
-    const newMsgs: Array<{ type: string; content?: string; metadata?: Record<string, unknown> }> = []
-    const origHandleSSEEvent = handleSSEEvent
-
-    const trackingHandler = (event: Record<string, unknown>, mid: string) => {
-      origHandleSSEEvent(event, mid)
-      const t = event.type as string
-      if (t === 'paper_artifact') newMsgs.push({ type: 'paper_artifact', metadata: { paper: event.paper } })
-      if (t === 'suggestion_chips') newMsgs.push({ type: 'chips', metadata: { chips: event.chips } })
-    }
-
+    // The backend persists this turn (user message, reply, artifacts) as it streams
     try {
       const supabase = createClient()
       const { data: { session } } = await supabase.auth.getSession()
@@ -501,18 +478,11 @@ export default function CanvasPage() {
           active_paper: activePaper ?? null,
         }),
       })
-      await processStreamWith(resp, assistantId, trackingHandler)
+      await processStreamWith(resp, assistantId, handleSSEEvent)
     } catch {
       setMessages(m => m.map(msg => msg.id === assistantId ? { ...msg, type: 'error', content: 'Failed to reach the backend.' } : msg))
     } finally {
       setStreaming(false)
-      // Persist assistant response and other artifacts after stream ends
-      setMessages(current => {
-        const aiMsg = current.find(m => m.id === assistantId)
-        if (aiMsg?.content) void persistMessage('assistant', aiMsg.content)
-        return current
-      })
-      for (const m of newMsgs) void persistMessage(m.type, m.content, m.metadata)
     }
   }
 